@@ -6,70 +6,366 @@ Database module for HanLP RESTful API Server
 Handles SQLite database operations for token management and statistics.
 """
 
+import base64
+import hashlib
+import hmac
+import secrets
 import sqlite3
 import os
-import time
-from typing import Optional, List, Tuple
+import queue
+import threading
+import uuid
+from contextlib import contextmanager
+from operator import itemgetter
+from typing import Iterator, Optional, List, Tuple
+
+from .cache import BloomFilter, LRUCache
+
+# SQL for the per-request auth and accounting path, kept as module-level constants so that
+# sqlite3's per-connection statement cache reuses the prepared statements
+# The planner prefers the UNIQUE constraint's index on token, so lookups name the covering index explicitly
+SQL_TOKEN_STATUS = 'SELECT is_valid, is_admin FROM tokens INDEXED BY idx_token_cov WHERE token = ?'
+SQL_IS_ADMIN_TOKEN = 'SELECT is_admin FROM tokens INDEXED BY idx_token_cov WHERE token = ?'
+SQL_ADD_TOKEN_USAGE = ('UPDATE tokens SET usage_count = usage_count + 1, char_count = char_count + ? '
+                       'WHERE token = ? AND is_valid = 1')
+SQL_AUTHORIZE_AND_CHARGE = SQL_ADD_TOKEN_USAGE + ' RETURNING is_admin'
+SQL_FLUSH_TOKEN_USAGE = ('UPDATE tokens SET usage_count = usage_count + ?, char_count = char_count + ? '
+                         'WHERE token = ? AND is_valid = 1')
+
+SCHEMA = '''
+    -- Tokens table
+    CREATE TABLE IF NOT EXISTS tokens (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        token TEXT UNIQUE NOT NULL,
+        applicant_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        is_valid BOOLEAN DEFAULT 1,
+        usage_count INTEGER DEFAULT 0,
+        char_count INTEGER DEFAULT 0,
+        is_admin BOOLEAN DEFAULT 0
+    );
+
+    -- Covering index so that token status lookups are answered from the index alone
+    DROP INDEX IF EXISTS idx_token;
+    CREATE INDEX IF NOT EXISTS idx_token_cov ON tokens(token, is_valid, is_admin);
+
+    -- Index on applicant_id for faster lookups
+    CREATE INDEX IF NOT EXISTS idx_applicant ON tokens(applicant_id);
+
+    -- Partial index over valid tokens only, so invalidating an applicant's tokens
+    -- touches just the rows that are still live
+    CREATE INDEX IF NOT EXISTS idx_valid_applicant ON tokens(applicant_id) WHERE is_valid = 1;
+'''
+# Names of the tables and indices created by SCHEMA
+SCHEMA_OBJECTS = ('tokens', 'idx_token_cov', 'idx_applicant', 'idx_valid_applicant')
+
+# Tokens issued under a secret look like hlp_<applicant_id>.<nonce>.<signature>
+SIGNED_TOKEN_PREFIX = 'hlp_'
+
+# Stops at the first index entry of the applicant instead of reading all their rows
+SQL_HAS_TOKENS = 'SELECT EXISTS (SELECT 1 FROM tokens INDEXED BY idx_applicant WHERE applicant_id = ?)'
+
+# Tokens added since the last refresh of TokenDB's Bloom filter, found through the rowid
+SQL_NEW_TOKENS = 'SELECT id, token FROM tokens WHERE id > ?'
+
+# Token listings are read a page at a time, each on a connection borrowed just for that page, so
+# that no connection or read transaction stays open while the caller consumes the rows. Pages
+# continue after the last row of the previous one, ordered by a key ending in the unique token
+LISTING_PAGE_SIZE = 1000
+SQL_TOKEN_STATS = ('SELECT token, applicant_id, created_at, usage_count, char_count, is_valid, is_admin '
+                   'FROM tokens {} ORDER BY usage_count DESC, token LIMIT ?')
+SQL_VALID_TOKENS = 'SELECT token FROM tokens WHERE is_valid = 1 AND token > ? ORDER BY token LIMIT ?'
+
+# UPDATE ... RETURNING is available since SQLite 3.35
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
 
 
 class TokenDB:
     """SQLite database for token management and statistics"""
 
-    def __init__(self, db_path: str = "tokens.db"):
+    def __init__(self, db_path: str = "tokens.db", cache_size: int = 10000, usage_flush_interval: float = 0.5,
+                 secret: Optional[str] = None, cache_ttl: Optional[float] = 30, max_idle_connections: int = 8):
+        """Open the database.
+
+        Args:
+            db_path (str): Path to SQLite database file
+            cache_size (int): Maximum number of cached token statuses
+            usage_flush_interval (float): Seconds between writes of buffered usage statistics,
+                0 to write them immediately
+            secret (str): Key for signing issued tokens. When set, tokens that are neither correctly
+                signed nor known unsigned tokens are rejected without a database query
+            cache_ttl (float): Seconds a cached token status is trusted, which bounds how long changes
+                made by other processes go unnoticed. None to cache until evicted
+            max_idle_connections (int): Maximum number of connections kept open between queries. Bursts
+                may open more, which are closed once returned
+        """
         self.db_path = db_path
+        self._secret = secret.encode('utf-8') if secret else None
+        # token -> (is_valid, is_admin), kept in sync by every method that mutates tokens
+        self._token_cache = LRUCache(cache_size, ttl=cache_ttl)
+        # Bumped by every mutation, so that a status read before it is not cached after it
+        self._cache_generation = 0
+        self._cache_lock = threading.Lock()
+        # Long-lived connections shared by all threads, so SQLite's page cache stays warm between queries.
+        # Request threads come and go, so connections are pooled rather than kept per thread.
+        # SimpleQueue is cheaper but needs Python 3.7
+        self._pool = queue.SimpleQueue() if hasattr(queue, 'SimpleQueue') else queue.Queue()
+        self.max_idle_connections = max_idle_connections
+        # Every connection to :memory: opens a separate empty database, so an in-memory
+        # TokenDB keeps a single connection for its lifetime and all methods take turns on it
+        self._in_memory = db_path == ':memory:'
+        if self._in_memory:
+            self._pool.put(self._connect())
         self.init_db()
 
+        # Tokens that can't be checked by signature, so that unknown ones are rejected without a
+        # query. Without a secret, a Bloom filter of every token. With a secret, the exact set of
+        # unsigned tokens (the admin token, or tokens issued before a secret was configured), so
+        # that forgeries without the signed prefix are rejected as well
+        self._known_tokens = None
+        self._known_max_id = 0
+        self._known_lock = threading.Lock()
+        # Tokens added by other processes are picked up by reading the rows past the highest id
+        # seen, but only once data_version shows that another connection committed since the last
+        # refresh. A dedicated connection reads it, since the value is relative to a connection
+        self._known_version = None
+        self._version_conn = None if self._in_memory else self._connect()
+        self._version_lock = threading.Lock()
+        self._refresh_known_tokens()
+
+        # token -> [usage_count, char_count] not yet written to the database
+        self._pending_usage = {}
+        self._pending_lock = threading.Lock()
+        self._closed = threading.Event()
+        self.usage_flush_interval = usage_flush_interval
+        if usage_flush_interval:
+            threading.Thread(target=self._flush_worker, daemon=True).start()
+
+    def _configure(self, conn: sqlite3.Connection):
+        """Apply per-connection PRAGMAs tuned for concurrent reads and cheap commits"""
+        # Only takes effect on a new database, before WAL or the first table is written, and lets
+        # maintenance() return free pages to the file system without a full VACUUM
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        if self.db_path != ':memory:':
+            # WAL is persistent in the database file and lets readers run alongside a writer
+            conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-20000')
+        conn.execute('PRAGMA mmap_size=268435456')
+        conn.execute('PRAGMA busy_timeout=5000')
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a configured connection to the database"""
+        # Autocommit mode, transactions are opened explicitly by _write_tx
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256,
+                               isolation_level=None)
+        self._configure(conn)
+        return conn
+
+    @contextmanager
+    def _conn(self):
+        """Borrow a pooled connection"""
+        try:
+            conn = self._pool.get(block=self._in_memory)
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if self._in_memory or self._pool.qsize() < self.max_idle_connections:
+                self._pool.put(conn)
+            else:
+                conn.close()
+
+    @contextmanager
+    def _write_tx(self):
+        """Borrow a pooled connection inside a transaction that takes the write lock up front.
+
+        BEGIN IMMEDIATE avoids upgrading a read transaction to a write one halfway, which fails
+        with SQLITE_BUSY when another writer got there first.
+        """
+        with self._conn() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def _flush_worker(self):
+        """Background thread function that periodically writes buffered usage statistics"""
+        while not self._closed.wait(self.usage_flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                # E.g. the database stayed locked past busy_timeout, the next flush retries
+                print(f"Writing usage statistics failed: {e}")
+
+    def flush(self):
+        """Write buffered usage statistics to the database in a single transaction.
+
+        If the write fails, the statistics are buffered again and the error is raised.
+        """
+        with self._pending_lock:
+            if not self._pending_usage:
+                return
+            pending, self._pending_usage = self._pending_usage, {}
+        try:
+            with self._write_tx() as conn:
+                conn.executemany(SQL_FLUSH_TOKEN_USAGE,
+                                 [(usage, chars, token) for token, (usage, chars) in pending.items()])
+        except BaseException:
+            with self._pending_lock:
+                for token, (usage, chars) in pending.items():
+                    buffered = self._pending_usage.get(token)
+                    if buffered is None:
+                        self._pending_usage[token] = [usage, chars]
+                    else:
+                        buffered[0] += usage
+                        buffered[1] += chars
+            raise
+
+    def close(self):
+        """Write buffered usage statistics and close all pooled connections"""
+        self._closed.set()
+        self.flush()
+        if self._version_conn is not None:
+            self._version_conn.close()
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
     def init_db(self):
         """Initialize the database and create tables if they don't exist"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._conn() as conn:
+            # Skip the DDL on a warm start where the schema is already in place
+            count = conn.execute(
+                'SELECT count(*) FROM sqlite_master WHERE name IN (%s)' % ', '.join('?' * len(SCHEMA_OBJECTS)),
+                SCHEMA_OBJECTS).fetchone()[0]
+            if count == len(SCHEMA_OBJECTS):
+                return
+            # Create all tables and indices in a single transaction
+            conn.executescript('BEGIN;' + SCHEMA + 'COMMIT;')
 
-            # Create tokens table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS tokens (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    token TEXT UNIQUE NOT NULL,
-                    applicant_id INTEGER NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    is_valid BOOLEAN DEFAULT 1,
-                    usage_count INTEGER DEFAULT 0,
-                    char_count INTEGER DEFAULT 0,
-                    is_admin BOOLEAN DEFAULT 0
-                )
-            ''')
-
-            # Create index on token for faster lookups
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_token ON tokens(token)
-            ''')
+    def _sign(self, payload: str) -> str:
+        """Compute the URL-safe HMAC-SHA256 signature of a token payload"""
+        digest = hmac.new(self._secret, payload.encode('utf-8'), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
 
-            # Create index on applicant_id for faster lookups
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_applicant ON tokens(applicant_id)
-            ''')
+    def _may_exist(self, token: str) -> bool:
+        """Check without a query by token whether a token can possibly be in the database"""
+        if self._secret and token.startswith(SIGNED_TOKEN_PREFIX):
+            payload, _, signature = token.rpartition('.')
+            # compare_digest only accepts ASCII strings, while headers can carry any character
+            return hmac.compare_digest(signature.encode('utf-8'), self._sign(payload).encode('ascii'))
+        if token in self._known_tokens:
+            return True
+        # The token may have been added by another process since the last refresh
+        version = self._data_version()
+        if version is None or version == self._known_version:
+            return False
+        self._refresh_known_tokens()
+        return token in self._known_tokens
 
-            conn.commit()
+    def _data_version(self) -> Optional[int]:
+        """A value that changes whenever another connection commits, None for an in-memory database"""
+        if self._version_conn is None:
+            return None
+        with self._version_lock:
+            return self._version_conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _remember_token(self, token: str):
+        """Add a token to the known tokens, must be called holding _known_lock"""
+        if self._secret:
+            if not token.startswith(SIGNED_TOKEN_PREFIX):
+                self._known_tokens.add(token)
+        # Tokens the filter already reports are skipped, so rows read twice aren't counted twice
+        elif token not in self._known_tokens:
+            self._known_tokens.add(token)
+
+    def _refresh_known_tokens(self):
+        """Add tokens inserted since the last refresh to the known tokens, rebuilding a full Bloom filter"""
+        with self._known_lock:
+            # Read before the rows, so that commits made during the scan trigger another refresh
+            version = self._data_version()
+            if self._known_tokens is not None and version == self._known_version:
+                # Another thread refreshed in the meantime
+                return
+            if self._secret:
+                if self._known_tokens is None:
+                    self._known_tokens = set()
+            elif self._known_tokens is None or len(self._known_tokens) > self._known_tokens.capacity:
+                with self._conn() as conn:
+                    count = conn.execute('SELECT count(*) FROM tokens').fetchone()[0]
+                self._known_tokens = BloomFilter(max(10000, 2 * count))
+                self._known_max_id = 0
+            with self._conn() as conn:
+                cursor = conn.execute(SQL_NEW_TOKENS, (self._known_max_id,))
+                cursor.arraysize = 1000
+                for rows in iter(cursor.fetchmany, []):
+                    for _, token in rows:
+                        self._remember_token(token)
+                    self._known_max_id = max(self._known_max_id, rows[-1][0])
+            self._known_version = version
+
+    def generate_token(self, applicant_id: int) -> str:
+        """Generate a new token, signed when a secret is configured"""
+        if not self._secret:
+            return str(uuid.uuid4())
+        payload = f'{SIGNED_TOKEN_PREFIX}{applicant_id}.{secrets.token_urlsafe(16)}'
+        return f'{payload}.{self._sign(payload)}'
+
+    def maintenance(self, pages: int = 1000):
+        """Refresh query planner statistics and reclaim up to `pages` free pages"""
+        with self._conn() as conn:
+            conn.execute('PRAGMA optimize')
+            # The pragma frees one page per step and execute() only steps it once, while
+            # executescript() runs it to completion
+            conn.executescript(f'PRAGMA incremental_vacuum({int(pages)});')
 
     def add_token(self, token: str, applicant_id: int, is_admin: bool = False) -> bool:
         """Add a new token to the database"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._write_tx() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO tokens (token, applicant_id, is_admin)
                     VALUES (?, ?, ?)
                 ''', (token, applicant_id, is_admin))
-                conn.commit()
-                return True
+            self._forget_tokens([token])
+            with self._known_lock:
+                self._remember_token(token)
+                # Rows in between may have been added by other processes and are still to be read
+                if cursor.lastrowid == self._known_max_id + 1:
+                    self._known_max_id = cursor.lastrowid
+            return True
         except sqlite3.IntegrityError:
             # Token already exists
             return False
         except Exception:
             return False
 
+    def add_tokens_bulk(self, rows: List[Tuple[str, int, bool]]) -> int:
+        """Add many (token, applicant_id, is_admin) rows in a single transaction, skipping existing tokens"""
+        with self._write_tx() as conn:
+            cursor = conn.executemany('''
+                INSERT OR IGNORE INTO tokens (token, applicant_id, is_admin)
+                VALUES (?, ?, ?)
+            ''', rows)
+        self._forget_tokens([token for token, _, _ in rows])
+        with self._known_lock:
+            for token, _, _ in rows:
+                self._remember_token(token)
+        return cursor.rowcount
+
     def get_token_info(self, token: str) -> Optional[Tuple]:
         """Get token information by token value"""
-        with sqlite3.connect(self.db_path) as conn:
+        self.flush()
+        with self._conn() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, token, applicant_id, is_valid, usage_count, char_count, is_admin
@@ -78,39 +374,60 @@ class TokenDB:
             ''', (token,))
             return cursor.fetchone()
 
+    def _token_status(self, token: str) -> Tuple[bool, bool]:
+        """Get (is_valid, is_admin) of a token, served from the cache when possible"""
+        if not self._may_exist(token):
+            # Not cached either, so that floods of forged tokens can't evict genuine entries
+            return False, False
+        status = self._token_cache.get(token)
+        if status is None:
+            generation = self._cache_generation
+            with self._conn() as conn:
+                result = conn.execute(SQL_TOKEN_STATUS, (token,)).fetchone()
+            status = (result[0] == 1, result[1] == 1) if result else (False, False)
+            with self._cache_lock:
+                # A mutation since the query may already have dropped this token, so its status is stale
+                if generation == self._cache_generation:
+                    self._token_cache.put(token, status)
+        return status
+
+    def _forget_tokens(self, tokens: Optional[List[str]] = None):
+        """Drop the cached status of mutated tokens, or of every token if they are not known"""
+        with self._cache_lock:
+            self._cache_generation += 1
+            if tokens is None:
+                self._token_cache.clear()
+            else:
+                for token in tokens:
+                    self._token_cache.pop(token)
+
     def is_valid_token(self, token: str) -> bool:
         """Check if a token is valid"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT is_valid FROM tokens WHERE token = ?
-            ''', (token,))
-            result = cursor.fetchone()
-            return result and result[0] == 1
+        return self._token_status(token)[0]
 
     def is_admin_token(self, token: str) -> bool:
         """Check if a token is an admin token"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT is_admin FROM tokens WHERE token = ?
-            ''', (token,))
-            result = cursor.fetchone()
-            return result and result[0] == 1
+        return self._token_status(token)[1]
+
+    def is_valid_admin_token(self, token: str) -> bool:
+        """Check if a token is both valid and an admin token, with a single status lookup"""
+        is_valid, is_admin = self._token_status(token)
+        return is_valid and is_admin
 
     def invalidate_token(self, token: str) -> bool:
         """Invalidate a token"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._write_tx() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE tokens SET is_valid = 0 WHERE token = ?
             ''', (token,))
-            conn.commit()
-            return cursor.rowcount > 0
+        self._forget_tokens([token])
+        return cursor.rowcount > 0
 
     def get_tokens_by_applicant(self, user_id: int) -> List[Tuple]:
         """Get all tokens for a specific user"""
-        with sqlite3.connect(self.db_path) as conn:
+        self.flush()
+        with self._conn() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, token, created_at, is_valid, usage_count, char_count
@@ -120,54 +437,105 @@ class TokenDB:
             ''', (user_id,))
             return cursor.fetchall()
 
+    def has_tokens(self, user_id: int) -> bool:
+        """Check if a user has any tokens, valid or not, with a single index probe"""
+        with self._conn() as conn:
+            return conn.execute(SQL_HAS_TOKENS, (user_id,)).fetchone()[0] == 1
+
     def invalidate_tokens_by_applicant(self, user_id: int) -> int:
         """Invalidate all tokens for a specific user"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._write_tx() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                UPDATE tokens SET is_valid = 0 WHERE applicant_id = ?
+                UPDATE tokens SET is_valid = 0 WHERE applicant_id = ? AND is_valid = 1
             ''', (user_id,))
-            conn.commit()
-            return cursor.rowcount
+        # The affected tokens are not known here, so drop every cached status
+        self._forget_tokens()
+        return cursor.rowcount
 
     def add_token_usage(self, token: str, char_count: int) -> bool:
         """Add usage statistics for a token"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE tokens
-                SET usage_count = usage_count + 1, char_count = char_count + ?
-                WHERE token = ? AND is_valid = 1
-            ''', (char_count, token))
-            conn.commit()
-            return cursor.rowcount > 0
-
-    def get_all_tokens_stats(self) -> List[Tuple]:
-        """Get statistics for all tokens (for admin use)"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT token, applicant_id, created_at, usage_count, char_count, is_valid, is_admin
-                FROM tokens
-                ORDER BY usage_count DESC
-            ''')
-            return cursor.fetchall()
+        if not self.usage_flush_interval:
+            with self._write_tx() as conn:
+                return conn.execute(SQL_ADD_TOKEN_USAGE, (char_count, token)).rowcount > 0
+        if not self.is_valid_token(token):
+            return False
+        self._buffer_usage(token, char_count)
+        return True
+
+    def _buffer_usage(self, token: str, char_count: int):
+        """Add usage statistics of a valid token to the buffer written by flush"""
+        with self._pending_lock:
+            usage = self._pending_usage.get(token)
+            if usage is None:
+                self._pending_usage[token] = [1, char_count]
+            else:
+                usage[0] += 1
+                usage[1] += char_count
+
+    def authorize_and_charge(self, token: str, char_count: int) -> Optional[bool]:
+        """Validate a token and add its usage statistics.
+
+        With buffered usage statistics the token status comes from the cache, otherwise validation
+        and the usage update run as one statement.
+
+        Returns None if the token is not valid, otherwise whether it is an admin token.
+        """
+        if self.usage_flush_interval:
+            is_valid, is_admin = self._token_status(token)
+            if not is_valid:
+                return None
+            self._buffer_usage(token, char_count)
+            return is_admin
+        if not self._may_exist(token):
+            return None
+        with self._write_tx() as conn:
+            if HAS_RETURNING:
+                rows = conn.execute(SQL_AUTHORIZE_AND_CHARGE, (char_count, token)).fetchall()
+            elif conn.execute(SQL_ADD_TOKEN_USAGE, (char_count, token)).rowcount > 0:
+                rows = conn.execute(SQL_IS_ADMIN_TOKEN, (token,)).fetchall()
+            else:
+                rows = None
+            if not rows:
+                return None
+            return rows[0][0] == 1
+
+    def get_all_tokens_stats(self) -> Iterator[Tuple]:
+        """Get statistics for all tokens (for admin use), yielding rows a page at a time.
+
+        Pages are separate reads, so a token whose usage grows while the rows are consumed may move
+        to a page already read and be left out.
+        """
+        self.flush()
+        query, params = SQL_TOKEN_STATS.format(''), ()
+        while True:
+            with self._conn() as conn:
+                rows = conn.execute(query, params + (LISTING_PAGE_SIZE,)).fetchall()
+            yield from rows
+            if len(rows) < LISTING_PAGE_SIZE:
+                return
+            token, usage_count = rows[-1][0], rows[-1][3]
+            query = SQL_TOKEN_STATS.format('WHERE usage_count < ? OR usage_count = ? AND token > ?')
+            params = (usage_count, usage_count, token)
 
     def delete_token(self, token: str) -> bool:
         """Delete a token from the database (admin only)"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._write_tx() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 DELETE FROM tokens WHERE token = ?
             ''', (token,))
-            conn.commit()
-            return cursor.rowcount > 0
+        self._forget_tokens([token])
+        return cursor.rowcount > 0
 
-    def get_valid_tokens(self) -> List[str]:
-        """Get all valid tokens"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT token FROM tokens WHERE is_valid = 1
-            ''')
-            return [row[0] for row in cursor.fetchall()]
\ No newline at end of file
+    def get_valid_tokens(self) -> Iterator[str]:
+        """Get all valid tokens, yielding them a page at a time"""
+        token = ''
+        while True:
+            with self._conn() as conn:
+                rows = conn.execute(SQL_VALID_TOKENS, (token, LISTING_PAGE_SIZE)).fetchall()
+            # Unpack the rows at C level
+            yield from map(itemgetter(0), rows)
+            if len(rows) < LISTING_PAGE_SIZE:
+                return
+            token = rows[-1][0]
\ No newline at end of file
@@ -12,21 +12,120 @@ A secure, efficient, and maintainable implementation with:
 - Comprehensive security measures
 """
 import argparse
+import contextlib
+import itertools
+import multiprocessing
 import json
 import threading
 import time
 import queue
+import heapq
+from collections import OrderedDict
+from operator import itemgetter
 from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+from socketserver import ThreadingMixIn
+from urllib.parse import unquote_plus
+from .cache import LRUCache
 from .stopwords import DEFAULT_STOPWORDS
-import uuid
 
-from hanlp_common.document import Document
 import hanlp
 import threading
 import socket
 
-class HTTPServerV6(HTTPServer):
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import torch
+except ImportError:
+    torch = None
+
+# Scheme prefix of the Authorization header
+BEARER_PREFIX = 'Bearer '
+
+# Fields of a token statistics row, in TokenDB.get_all_tokens_stats order
+STATS_COLUMNS = ('token', 'applicant_id', 'created_at', 'usage_count', 'char_count', 'is_valid', 'is_admin')
+
+# Constant response header lines, encoded once
+CORS_HEADERS = (b'Access-Control-Allow-Origin: *\r\n'
+                b'Access-Control-Allow-Methods: POST, GET, OPTIONS\r\n'
+                b'Access-Control-Allow-Headers: Content-Type, Authorization\r\n')
+JSON_CORS_HEADERS = b'Content-Type: application/json\r\n' + CORS_HEADERS
+
+# Built once, so that stopword checks are hash lookups
+DEFAULT_STOPWORD_SET = frozenset(DEFAULT_STOPWORDS)
+
+
+def json_dumps(data):
+    """Serialize data to UTF-8 encoded JSON, using orjson when it is installed.
+
+    Args:
+        data: The data to serialize
+
+    Returns:
+        bytes: The encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+def json_loads(data):
+    """Deserialize JSON, using orjson when it is installed.
+
+    Args:
+        data (bytes or str): The JSON document
+
+    Returns:
+        The deserialized data
+
+    Raises:
+        json.JSONDecodeError: If data is not valid JSON
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def parse_query(query, keys):
+    """Parse the first non-empty value of some parameters from a query string.
+
+    Unlike urllib.parse.parse_qs, only the values of the given keys are decoded.
+
+    Args:
+        query (str): Query string without the leading '?'
+        keys: Names of the parameters to parse
+
+    Returns:
+        dict: Decoded value by parameter name, for the parameters present
+    """
+    params = {}
+    for pair in query.split('&'):
+        name, _, value = pair.partition('=')
+        if value:
+            name = unquote_plus(name)
+            if name in keys and name not in params:
+                params[name] = unquote_plus(value)
+    return params
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+  """HTTP server that handles each connection in its own thread, so that requests
+  waiting on the model do not block other clients."""
+  daemon_threads = True
+  # Listen backlog; the default of 5 drops connections when many clients connect at once
+  request_queue_size = 128
+  # Let several processes listen on the same port, the kernel spreads connections among them
+  reuse_port = False
+
+  def server_bind(self):
+    if self.reuse_port:
+      self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    super().server_bind()
+
+class HTTPServerV6(ThreadingHTTPServer):
   address_family = socket.AF_INET6
 
 class TaskQueue:
@@ -36,22 +135,45 @@ class TaskQueue:
     with a configurable number of worker threads and timeout handling.
     """
 
-    def __init__(self, max_workers=5, timeout=180):
+    def __init__(self, max_workers=5, timeout=180, max_batch_size=16, max_results=10000, batch_delay=0):
         """Initialize the task queue with specified parameters.
 
         Args:
             max_workers (int): Maximum number of concurrent worker threads (default: 5)
             timeout (int): Maximum processing time in seconds before timeout (default: 180)
+            max_batch_size (int): Maximum number of items processed in one batch (default: 16)
+            max_results (int): Maximum number of results kept for tasks nobody waited for (default: 10000).
+                Such results are also dropped once they are older than twice the timeout
+            batch_delay (float): Seconds a batch that is not full waits for more items before it is
+                processed, trading latency for larger batches (default: 0)
         """
         self.max_workers = max_workers
         self.timeout = timeout
-        self.task_queue = queue.Queue()
+        self.max_batch_size = max_batch_size
+        self.max_results = max_results
+        self.batch_delay = batch_delay
+        # A single queue shared by all workers, so an idle worker takes the next task as soon as it
+        # is queued. SimpleQueue is implemented in C without Python-level locks, but needs Python 3.7
+        self.queue = queue.SimpleQueue() if hasattr(queue, 'SimpleQueue') else queue.Queue()
         self.workers = []
-        self.results = {}
+        # Task IDs only need to be unique within this queue
+        self._next_id = itertools.count(1).__next__
+        # (Creation time, result entry) by task ID in submission order, removed once read. Tasks
+        # carry their entry, so evicting an ID only makes its result unreachable. Every access is
+        # a single dict operation, which the GIL (or the per-object locks of free-threaded builds)
+        # makes atomic, so there is no lock. An entry's status and result are written before its
+        # event is set and read after it
+        self.results = OrderedDict()
+        # Items waiting to be batched, keyed by batch key. A key is present exactly
+        # while one batch task for it sits in the queue
+        self.batches = {}
+        # Guards batches, whose updates read and write several keys
         self.lock = threading.Lock()
+        # Sentinel task that tells a worker to exit
+        self._shutdown = object()
 
         # Start worker threads
-        for i in range(max_workers):
+        for _ in range(max_workers):
             worker = threading.Thread(target=self._worker, daemon=True)
             worker.start()
             self.workers.append(worker)
@@ -59,23 +181,104 @@ class TaskQueue:
     def _worker(self):
         """Worker thread function that processes tasks from the queue.
 
-        This method runs in a continuous loop, processing tasks from the queue
-        with a timeout. It handles both successful completions and exceptions.
+        This method runs in a continuous loop, blocking on the queue until a task
+        arrives. It handles both successful completions and exceptions, and exits
+        when it receives the shutdown sentinel.
         """
         while True:
-            try:
-                task_id, func, args, kwargs = self.task_queue.get(timeout=1)
-                try:
-                    result = func(*args, **kwargs)
-                    with self.lock:
-                        self.results[task_id] = {'status': 'completed', 'result': result}
-                except Exception as e:
-                    with self.lock:
-                        self.results[task_id] = {'status': 'error', 'error': str(e)}
-                finally:
-                    self.task_queue.task_done()
-            except queue.Empty:
+            task = self.queue.get()
+            if task is self._shutdown:
+                return
+            entry, func, args, kwargs = task
+            if entry is None:
+                self._process_batch(func, *args)
                 continue
+            try:
+                result = func(*args, **kwargs)
+                entry.update(status='completed', result=result)
+            except Exception as e:
+                entry.update(status='error', error=str(e))
+            finally:
+                # Wake up the waiter in wait_for_result
+                entry['event'].set()
+
+    def _put(self, task):
+        """Put a task on the queue.
+
+        Args:
+            task (tuple): The task to put
+        """
+        self.queue.put(task)
+
+    def _process_batch(self, func, key):
+        """Process up to max_batch_size pending items of a batch key with a single call.
+
+        Args:
+            func: Function taking a list of items and returning one result per item,
+                where an exception instance marks a failed item
+            key: The batch key
+        """
+        if self.batch_delay:
+            with self.lock:
+                full = len(self.batches[key]) >= self.max_batch_size
+            if not full:
+                # Let items submitted shortly after join this batch
+                time.sleep(self.batch_delay)
+        with self.lock:
+            batch = self.batches.pop(key)
+            if len(batch) > self.max_batch_size:
+                self.batches[key] = batch[self.max_batch_size:]
+                batch = batch[:self.max_batch_size]
+                # Keep one batch task queued for the remaining items
+                self._put((None, func, (key,), {}))
+            entries = [entry for entry, _ in batch]
+        try:
+            results = func([item for _, item in batch])
+            for entry, result in zip(entries, results):
+                if isinstance(result, Exception):
+                    entry.update(status='error', error=str(result))
+                else:
+                    entry.update(status='completed', result=result)
+        except Exception as e:
+            for entry in entries:
+                entry.update(status='error', error=str(e))
+        finally:
+            for entry in entries:
+                entry['event'].set()
+
+    def shutdown(self):
+        """Stop all worker threads once the tasks queued before this call are done."""
+        for _ in self.workers:
+            self._put(self._shutdown)
+
+    @staticmethod
+    def _unregistered_entry():
+        """Create the result entry of a task that is waited for directly, without a task ID.
+
+        Returns:
+            dict: The result entry
+        """
+        return {'status': 'queued', 'event': threading.Event()}
+
+    def _new_entry(self):
+        """Register the result entry of a new task.
+
+        Returns:
+            tuple: The task ID and its result entry
+        """
+        task_id = self._next_id()
+        entry = self._unregistered_entry()
+        now = time.monotonic()
+        self.results[task_id] = (now, entry)
+        # Results nobody waited for are the oldest ones, so only the front needs to be checked
+        expired = now - 2 * self.timeout
+        try:
+            while len(self.results) > self.max_results or next(iter(self.results.values()))[0] < expired:
+                self.results.popitem(last=False)
+        except (KeyError, StopIteration, RuntimeError):
+            # Emptied or changed by concurrent waiters, the next task checks again
+            pass
+        return task_id, entry
 
     def submit(self, func, *args, **kwargs):
         """Submit a task for asynchronous processing.
@@ -86,48 +289,109 @@ class TaskQueue:
             **kwargs: Keyword arguments for the function
 
         Returns:
-            str: A unique task ID for tracking the result
+            int: A unique task ID for tracking the result
         """
-        task_id = str(uuid.uuid4())
-        with self.lock:
-            self.results[task_id] = {'status': 'queued'}
-        self.task_queue.put((task_id, func, args, kwargs))
+        task_id, entry = self._new_entry()
+        self._put((entry, func, args, kwargs))
+        return task_id
+
+    def submit_batch(self, func, key, item):
+        """Submit an item to be processed together with other pending items of the same key.
+
+        Items accumulate while the workers are busy, so batches grow with the load
+        and a single item is processed right away when the server is idle.
+
+        Args:
+            func: Function taking a list of items and returning one result per item,
+                where an exception instance marks a failed item
+            key: Hashable key; only items with equal keys are processed in the same call
+            item: The item to process
+
+        Returns:
+            int: A unique task ID for tracking the result
+        """
+        task_id, entry = self._new_entry()
+        self._add_to_batch(func, key, entry, item)
         return task_id
 
+    def run_batch(self, func, key, item):
+        """Process an item together with other pending items of the same key and wait for its result.
+
+        This is submit_batch followed by wait_for_result for callers that block anyway,
+        without registering the result under a task ID.
+
+        Args:
+            func: Function taking a list of items and returning one result per item,
+                where an exception instance marks a failed item
+            key: Hashable key; only items with equal keys are processed in the same call
+            item: The item to process
+
+        Returns:
+            dict: Task result with status (completed, error, or timeout) and result/error info
+        """
+        entry = self._unregistered_entry()
+        self._add_to_batch(func, key, entry, item)
+        return self._wait(entry)
+
+    def _add_to_batch(self, func, key, entry, item):
+        """Add an item to the pending batch of its key, queueing a batch task for a new batch.
+
+        Args:
+            func: Function processing the batch
+            key: The batch key
+            entry (dict): Result entry of the item
+            item: The item to process
+        """
+        with self.lock:
+            batch = self.batches.get(key)
+            if batch is not None:
+                batch.append((entry, item))
+                return
+            self.batches[key] = [(entry, item)]
+        self._put((None, func, (key,), {}))
+
     def get_result(self, task_id):
         """Get the result of a submitted task.
 
         Args:
-            task_id (str): The unique task ID
+            task_id (int): The unique task ID
 
         Returns:
             dict or None: Task result or None if task doesn't exist
         """
-        with self.lock:
-            return self.results.get(task_id, None)
+        created_entry = self.results.get(task_id, None)
+        return None if created_entry is None else created_entry[1]
 
     def wait_for_result(self, task_id):
         """Wait for a task result with timeout.
 
         This method blocks until the task completes, errors, or times out.
+        The worker signals completion through the task's event, so no polling is involved.
+        The result is removed from the queue, so each task can be waited for only once.
 
         Args:
-            task_id (str): The unique task ID
+            task_id (int): The unique task ID
 
         Returns:
             dict: Task result with status (completed, error, or timeout) and result/error info
         """
-        start_time = time.time()
-        while time.time() - start_time < self.timeout:
-            result = self.get_result(task_id)
-            if result and result['status'] in ['completed', 'error']:
-                return result
-            time.sleep(0.1)
+        return self._wait(self.results.pop(task_id, (None, None))[1])
+
+    def _wait(self, entry):
+        """Wait until a result entry is completed or the timeout is reached.
+
+        Args:
+            entry (dict): The result entry, None for an unknown task
+
+        Returns:
+            dict: Task result with status (completed, error, or timeout) and result/error info
+        """
+        if entry is not None and entry['event'].wait(self.timeout):
+            return entry
 
         # Timeout reached
-        with self.lock:
-            if task_id in self.results:
-                self.results[task_id] = {'status': 'timeout', 'error': 'Processing timeout'}
+        if entry is not None and entry['status'] not in ('completed', 'error'):
+            entry.update(status='timeout', error='Processing timeout')
         return {'status': 'timeout', 'error': 'Processing timeout'}
 
 
@@ -138,18 +402,52 @@ class HanLPHandler(BaseHTTPRequestHandler):
     input validation, and concurrent processing using a task queue.
     """
 
+    # Keep connections open between requests, every response either has a length or closes the connection
+    protocol_version = 'HTTP/1.1'
+
+    # Seconds an idle connection is kept open waiting for its next request
+    timeout = 60
+
     # Shared task queue for concurrent request processing
     task_queue = TaskQueue(max_workers=5, timeout=180)  # 3 minutes timeout
 
     # Shared model instance
     model = None
 
+    # Run the model in bfloat16 on CUDA devices
+    mixed_precision = False
+
+    # Model results per (text, task options), shared by all requests
+    result_cache = LRUCache(maxsize=4096)
+
+    # Longer texts are not cached, which bounds the memory held by the caches
+    max_cached_text_length = 4096
+
+    # Word frequency responses per (text, max_words, stopword)
+    word_frequency_cache = LRUCache(maxsize=1024)
+
     # Database for token management
     token_db = None
 
     # Admin token for privileged operations
     admin_token = None
 
+    # Largest request body accepted, in bytes
+    max_body_size = 10 * 1024 * 1024
+
+    # Bearer token of the current request, set before it is dispatched
+    _bearer_token = None
+
+    # Authorization header of the connection's previous request and the token parsed from it
+    _last_auth_header = None
+    _last_bearer_token = None
+
+    # Second and formatted Date header value of the latest response
+    _date_cache = (None, None)
+
+    # Length of the current request's body not read yet
+    _unread_body = 0
+
     @classmethod
     def initialize_model(cls):
         """Initialize the HanLP model.
@@ -162,6 +460,63 @@ class HanLPHandler(BaseHTTPRequestHandler):
             # Using a simpler model that should be available
             cls.model = hanlp.load('CTB9_TOK_ELECTRA_BASE')
 
+    @classmethod
+    def _inference_context(cls):
+        """Context for model calls, which disables autograd and optionally enables mixed precision.
+
+        Returns:
+            contextlib.ExitStack: The entered contexts
+        """
+        stack = contextlib.ExitStack()
+        if torch is not None:
+            # Grad mode is thread local, so this has to be entered by the worker running the model
+            stack.enter_context(torch.inference_mode() if hasattr(torch, 'inference_mode') else torch.no_grad())
+            if cls.mixed_precision:
+                stack.enter_context(torch.autocast(device_type='cuda', dtype=torch.bfloat16))
+        return stack
+
+    def date_time_string(self, timestamp=None):
+        """Format the Date header, reusing the value formatted for the same second."""
+        if timestamp is not None:
+            return super().date_time_string(timestamp)
+        now = int(time.time())
+        second, value = HanLPHandler._date_cache
+        if second != now:
+            value = super().date_time_string(now)
+            HanLPHandler._date_cache = (now, value)
+        return value
+
+    def _send_headers(self, status_code, headers, content_length=None, body=b''):
+        """Send the status line, header lines and optionally the body, buffered into a single write.
+
+        Args:
+            status_code (int): HTTP status code
+            headers (bytes): Encoded constant header lines
+            content_length (int): Length of the body, if known
+            body (bytes): Complete body to send with the headers
+        """
+        # A request body the handler didn't read would be parsed as the next request on this connection
+        if self._unread_body:
+            if self._unread_body <= self.max_body_size:
+                self.rfile.read(self._unread_body)
+            else:
+                self.close_connection = True
+            self._unread_body = 0
+        if self.request_version == 'HTTP/0.9':
+            # Simple responses are the bare body, and send_response doesn't even create the buffer
+            if body:
+                self.wfile.write(body)
+            return
+        self.send_response(status_code)
+        if content_length is not None:
+            self.send_header('Content-Length', str(content_length))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        # send_response and send_header buffer their lines here until flush_headers writes them
+        self._headers_buffer.append(headers + b'\r\n')
+        self._headers_buffer.append(body)
+        self.flush_headers()
+
     def _send_response(self, data, status_code=200):
         """Send a JSON response with appropriate headers.
 
@@ -172,13 +527,57 @@ class HanLPHandler(BaseHTTPRequestHandler):
             data: The data to serialize as JSON
             status_code (int): HTTP status code (default: 200)
         """
-        self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
-        self.wfile.write(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        body = json_dumps(data)
+        self._send_headers(status_code, JSON_CORS_HEADERS, len(body), body)
+
+    def _send_stream_response(self, key, items, status_code=200, fields=None):
+        """Send a JSON object holding an array, encoding array items as they are produced.
+
+        Items are written in chunks of about 64 KB. The response has no Content-Length, so
+        it uses chunked transfer encoding for HTTP/1.1 clients, and closes the connection to
+        mark its end for older ones.
+
+        Args:
+            key (str): Name of the array member
+            items: Iterable of JSON serializable array items
+            status_code (int): HTTP status code (default: 200)
+            fields (dict): Other members of the object, written before the array (optional)
+        """
+        chunked = self.request_version == 'HTTP/1.1'
+        if chunked:
+            self._send_headers(status_code, JSON_CORS_HEADERS + b'Transfer-Encoding: chunked\r\n')
+            write = self._write_chunk
+        else:
+            self.close_connection = True
+            self._send_headers(status_code, JSON_CORS_HEADERS)
+            write = self.wfile.write
+
+        chunk = [b'{']
+        for name, value in (fields or {}).items():
+            chunk.append(json_dumps(name) + b': ' + json_dumps(value) + b', ')
+        chunk.append(json_dumps(key) + b': [')
+        size = 0
+        for i, item in enumerate(items):
+            piece = json_dumps(item)
+            chunk.append(b', ' + piece if i else piece)
+            size += len(piece)
+            if size >= 65536:
+                write(b''.join(chunk))
+                chunk = []
+                size = 0
+        chunk.append(b']}')
+        write(b''.join(chunk))
+        if chunked:
+            # Last chunk
+            self.wfile.write(b'0\r\n\r\n')
+
+    def _write_chunk(self, data):
+        """Write data as one chunk of a response with chunked transfer encoding.
+
+        Args:
+            data (bytes): The data, must not be empty
+        """
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
 
     def _send_error(self, message, status_code=400):
         """Send an error response in JSON format.
@@ -192,29 +591,28 @@ class HanLPHandler(BaseHTTPRequestHandler):
         self._send_response({'error': message}, status_code)
 
     def _process_stopwords(self, stopword):
-        """Process stopwords parameter and return a standardized stopword list.
+        """Process stopwords parameter and return a standardized stopword set.
 
-        This method normalizes the stopword input to a consistent format.
+        This method normalizes the stopword input to a consistent format. The
+        default stopwords are never modified.
 
         Args:
             stopword: Input stopword parameter (string, list, or None)
 
         Returns:
-            list: A list of stopwords
+            frozenset: A set of stopwords
 
         Raises:
             ValueError: If stopword is not a string, list, or None
         """
         # Apply stopword filtering if provided
-        stopword_list = DEFAULT_STOPWORDS
-        if stopword is not None:
-            if isinstance(stopword, str):
-                stopword_list += [stopword]
-            elif isinstance(stopword, list):
-                stopword_list += stopword
-            else:
-                raise ValueError('stopword must be a string or array of strings')
-        return stopword_list
+        if stopword is None:
+            return DEFAULT_STOPWORD_SET
+        if isinstance(stopword, str):
+            return DEFAULT_STOPWORD_SET.union([stopword])
+        if isinstance(stopword, list):
+            return DEFAULT_STOPWORD_SET.union(stopword)
+        raise ValueError('stopword must be a string or array of strings')
 
     def _parse_request_data(self):
         """Parse JSON request data with comprehensive error handling.
@@ -225,22 +623,58 @@ class HanLPHandler(BaseHTTPRequestHandler):
         Returns:
             tuple: (request_data, error_message) where either data or error_message is None
         """
-        content_length = int(self.headers.get('Content-Length', 0))
+        content_length = self._unread_body
         if content_length == 0:
             return None, 'Missing request body'
+        if content_length > self.max_body_size:
+            return None, 'Request body too large'
 
+        self._unread_body = 0
         try:
-            post_data = self.rfile.read(content_length)
-            # Try to decode as UTF-8, fallback to latin-1 if it fails
-            try:
-                decoded_data = post_data.decode('utf-8')
-            except UnicodeDecodeError:
-                decoded_data = post_data.decode('latin-1')
-            request_data = json.loads(decoded_data)
+            # JSON bodies must be UTF-8, which is parsed straight from the bytes
+            request_data = json_loads(self.rfile.read(content_length))
             return request_data, None
-        except json.JSONDecodeError:
+        except (UnicodeDecodeError, json.JSONDecodeError):
             return None, 'Invalid JSON in request body'
 
+    def _begin_request(self):
+        """Reset the per-request state before dispatching a request.
+
+        A connection serves several requests, so everything derived from the
+        headers is set again for each of them.
+        """
+        self._bearer_token = self._extract_bearer()
+        try:
+            self._unread_body = max(int(self.headers.get('Content-Length', 0)), 0)
+        except ValueError:
+            self._unread_body = 0
+            self.close_connection = True
+        if 'Transfer-Encoding' in self.headers:
+            # Chunked request bodies are not supported, so where this one ends is unknown
+            self.close_connection = True
+
+    def _extract_bearer(self):
+        """Extract the token from the Authorization header.
+
+        _begin_request calls this once per request and keeps the result in
+        self._bearer_token for the authentication checks. Clients on a kept-alive
+        connection usually repeat the same header, which is then parsed only once.
+        Whether the token is valid is still checked for every request.
+
+        Returns:
+            str or None: The Bearer token, or None if the header is missing or malformed
+        """
+        auth_header = self.headers.get('Authorization')
+        if auth_header == self._last_auth_header:
+            return self._last_bearer_token
+        if not auth_header or not auth_header.startswith(BEARER_PREFIX):
+            token = None
+        else:
+            token = auth_header[len(BEARER_PREFIX):].strip() or None  # Trim whitespace after the prefix
+        self._last_auth_header = auth_header
+        self._last_bearer_token = token
+        return token
+
     def _check_admin_auth(self):
         """Check if the request has admin privileges.
 
@@ -250,16 +684,12 @@ class HanLPHandler(BaseHTTPRequestHandler):
         Returns:
             bool: True if request has admin privileges, False otherwise
         """
-        auth_header = self.headers.get('Authorization')
-        if not auth_header or not isinstance(auth_header, str) or not auth_header.startswith('Bearer '):
-            return False
-
-        token = auth_header[7:].strip()  # Remove 'Bearer ' prefix and trim whitespace
+        token = self._bearer_token
         if not token:
             return False
 
-        if self.token_db and self.token_db.is_valid_token(token):
-            return self.token_db.is_admin_token(token)
+        if self.token_db:
+            return self.token_db.is_valid_admin_token(token)
         return False
 
     def _check_auth(self):
@@ -271,16 +701,47 @@ class HanLPHandler(BaseHTTPRequestHandler):
         Returns:
             bool: True if request is authenticated, False otherwise
         """
-        auth_header = self.headers.get('Authorization')
-        if not auth_header or not isinstance(auth_header, str) or not auth_header.startswith('Bearer '):
+        token = self._bearer_token
+        if not token:
             return False
 
-        token = auth_header[7:].strip()  # Remove 'Bearer ' prefix and trim whitespace
+        if self.token_db:
+            return self.token_db.is_valid_token(token)
+        return False
+
+    def _authorize_and_charge(self, char_count):
+        """Check Bearer token authentication and record usage statistics.
+
+        Validation and the usage update run as a single database statement.
+
+        Args:
+            char_count (int): Number of characters to add to the token's usage
+
+        Returns:
+            bool: True if request is authenticated, False otherwise
+        """
+        token = self._bearer_token
         if not token:
             return False
 
         if self.token_db:
-            return self.token_db.is_valid_token(token)
+            return self.token_db.authorize_and_charge(token, char_count) is not None
+        return False
+
+    def _require_auth(self):
+        """Check the Bearer token before the request body is read.
+
+        A missing, unknown or invalid token is answered with 401 and the connection
+        is closed, so the body of an unauthenticated request is neither read nor parsed.
+
+        Returns:
+            bool: True if the request may proceed, False if it was rejected
+        """
+        if self._check_auth():
+            return True
+        self.close_connection = True
+        self._unread_body = 0
+        self._send_error('Unauthorized: Invalid or missing Bearer token', 401)
         return False
 
     def do_OPTIONS(self):
@@ -289,11 +750,8 @@ class HanLPHandler(BaseHTTPRequestHandler):
         This method responds to OPTIONS requests with appropriate CORS headers
         to enable cross-origin requests from web browsers.
         """
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, GET, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
-        self.end_headers()
+        self._begin_request()
+        self._send_headers(200, CORS_HEADERS, 0)
 
     def do_POST(self):
         """Handle POST requests to various API endpoints.
@@ -301,24 +759,16 @@ class HanLPHandler(BaseHTTPRequestHandler):
         This method routes POST requests to appropriate handler methods
         based on the request path.
         """
-        # Parse URL to determine endpoint
-        parsed_url = urlparse(self.path)
-        endpoint = parsed_url.path
+        # Split off the query string to determine endpoint
+        endpoint = self.path.partition('?')[0]
+        self._begin_request()
 
         # Handle different endpoints
-        if endpoint == '/token/request':
-            return self._handle_token_request()
-        elif endpoint == '/token/delete':
-            return self._handle_token_delete()
-        elif endpoint == '/stats':
-            return self._handle_stats_request()
-        elif endpoint == '/tokenize':
-            return self._handle_text_processing()
-        elif endpoint == '/word-frequency':
-            return self._handle_word_frequency()
-        else:
-            # Default text processing endpoint
+        handler = self._POST_ROUTES.get(endpoint)
+        if handler is None:
             self._send_error('Invalid endpoint', 404)
+            return
+        return handler(self)
 
     def _handle_text_processing(self):
         """Handle text processing requests.
@@ -326,9 +776,7 @@ class HanLPHandler(BaseHTTPRequestHandler):
         This endpoint supports tokenization and other NLP tasks with
         optional stopword filtering and language specification.
         """
-        # Check authentication
-        if not self._check_auth():
-            self._send_error('Unauthorized: Invalid or missing Bearer token', 401)
+        if not self._require_auth():
             return
 
         # Parse request
@@ -349,24 +797,28 @@ class HanLPHandler(BaseHTTPRequestHandler):
             self._send_error('Missing "text" parameter')
             return
 
-        # Get token for statistics
-        auth_header = self.headers.get('Authorization')
-        token = auth_header[7:] if auth_header and auth_header.startswith('Bearer ') else None
-
-        # Submit task to queue
-        task_id = self.task_queue.submit(
-            self._process_text_with_stats,
-            text=text,
-            tasks=tasks,
-            can_duplicate=can_duplicate, 
-            skip_tasks=skip_tasks,
-            language=language,
-            token=token,
-            stopword=stopword
-        )
+        if not isinstance(text, str):
+            self._send_error('"text" must be a string')
+            return
 
-        # Wait for result with timeout
-        result = self.task_queue.wait_for_result(task_id)
+        # Check authentication and update usage statistics
+        if not self._authorize_and_charge(len(text)):
+            self._send_error('Unauthorized: Invalid or missing Bearer token', 401)
+            return
+
+        # Run on the task queue, batched with pending texts that share tasks, skip_tasks and language
+        result = self.task_queue.run_batch(
+            self._process_text_batch,
+            self._batch_key('text', tasks, skip_tasks, language),
+            dict(
+                text=text,
+                tasks=tasks,
+                can_duplicate=can_duplicate,
+                skip_tasks=skip_tasks,
+                language=language,
+                stopword=stopword
+            )
+        )
 
         if result['status'] == 'completed':
             self._send_response(result['result'])
@@ -381,9 +833,7 @@ class HanLPHandler(BaseHTTPRequestHandler):
         This endpoint calculates word frequencies in the provided text,
         with options for maximum words and custom stopwords.
         """
-        # Check authentication
-        if not self._check_auth():
-            self._send_error('Unauthorized: Invalid or missing Bearer token', 401)
+        if not self._require_auth():
             return
 
         # Parse request
@@ -400,27 +850,40 @@ class HanLPHandler(BaseHTTPRequestHandler):
             self._send_error('Missing "text" parameter')
             return
 
+        if not isinstance(text, str):
+            self._send_error('"text" must be a string')
+            return
+
         if not isinstance(max_words, int) or max_words < 1:
             self._send_error('max_words must be a positive integer')
             return
 
-        # Get token for statistics
-        auth_header = self.headers.get('Authorization')
-        token = auth_header[7:] if auth_header and auth_header.startswith('Bearer ') else None
-
-        # Submit task to queue
-        task_id = self.task_queue.submit(
-            self._process_word_frequency,
-            text=text,
-            max_words=max_words,
-            token=token,
-            stopword=stopword
-        )
+        # Check authentication and update usage statistics
+        if not self._authorize_and_charge(len(text)):
+            self._send_error('Unauthorized: Invalid or missing Bearer token', 401)
+            return
 
-        # Wait for result with timeout
-        result = self.task_queue.wait_for_result(task_id)
+        # Repeated requests are answered from the cache, after being charged
+        cache_key = (text, max_words, json_dumps(stopword))
+        cached = self.word_frequency_cache.get(cache_key)
+        if cached is not None:
+            self._send_response(cached)
+            return
+
+        # Run on the task queue, batched with other pending word frequency requests
+        result = self.task_queue.run_batch(
+            self._process_word_frequency_batch,
+            self._batch_key('word_frequency'),
+            dict(
+                text=text,
+                max_words=max_words,
+                stopword=stopword
+            )
+        )
 
         if result['status'] == 'completed':
+            if len(text) <= self.max_cached_text_length:
+                self.word_frequency_cache.put(cache_key, result['result'])
             self._send_response(result['result'])
         elif result['status'] == 'timeout':
             self._send_error('Request timeout: Processing took too long', 400)
@@ -450,11 +913,10 @@ class HanLPHandler(BaseHTTPRequestHandler):
             return
 
         # Generate a new token
-        new_token = str(uuid.uuid4())
+        new_token = self.token_db.generate_token(user_id)
 
         # Check if user already has tokens and invalidate them
-        existing_tokens = self.token_db.get_tokens_by_applicant(user_id)
-        reissued = len(existing_tokens) > 0
+        reissued = self.token_db.has_tokens(user_id)
         if reissued:
             self.token_db.invalidate_tokens_by_applicant(user_id)
 
@@ -512,22 +974,84 @@ class HanLPHandler(BaseHTTPRequestHandler):
         # Get statistics from database
         stats = self.token_db.get_all_tokens_stats()
 
-        # Format statistics for response
-        formatted_stats = []
-        for stat in stats:
-            formatted_stats.append({
-                'token': stat[0],
-                'applicant_id': stat[1],
-                'created_at': stat[2],
-                'usage_count': stat[3],
-                'char_count': stat[4],
-                'is_valid': bool(stat[5]),
-                'is_admin': bool(stat[6])
-            })
+        # Format statistics while streaming them to the client
+        self._send_stats(stats)
+
+    def _send_stats(self, stats):
+        """Stream token statistics to the client.
+
+        Rows are sent as objects under "stats", or with the query parameter format=columnar,
+        as arrays under "rows" with the field names listed once in "columns".
+
+        Args:
+            stats: Rows of TokenDB.get_all_tokens_stats
+        """
+        if parse_query(self.path.partition('?')[2], ('format',)).get('format') == 'columnar':
+            rows = ([token, applicant_id, created_at, usage_count, char_count, bool(is_valid), bool(is_admin)]
+                    for token, applicant_id, created_at, usage_count, char_count, is_valid, is_admin in stats)
+            self._send_stream_response('rows', rows, fields={'columns': STATS_COLUMNS})
+            return
+        formatted_stats = ({
+            'token': token,
+            'applicant_id': applicant_id,
+            'created_at': created_at,
+            'usage_count': usage_count,
+            'char_count': char_count,
+            'is_valid': bool(is_valid),
+            'is_admin': bool(is_admin)
+        } for token, applicant_id, created_at, usage_count, char_count, is_valid, is_admin in stats)
+        self._send_stream_response('stats', formatted_stats)
+
+    def _run_model(self, texts, tasks, skip_tasks=None, language=None):
+        """Run the HanLP model on a batch of texts with a single call for all tasks.
+
+        Results are cached per text, so only texts that missed the cache are passed
+        to the model. Cached results are shared and must not be modified.
+
+        Args:
+            texts (list): Input texts
+            tasks (list): Tasks to perform (e.g., ['tok', 'pos'])
+            skip_tasks (list): List of tasks to skip
+            language (str): Language of the texts
+
+        Returns:
+            list: Task results for each text as a dict keyed by task. A model which does
+            not output a Document only yields 'tok'.
+        """
+        options = json_dumps([tasks, skip_tasks, language])
+        results = [self.result_cache.get((text, options)) for text in texts]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            with self._inference_context():
+                output = self.model([texts[i] for i in missing], tasks=tasks, skip_tasks=skip_tasks,
+                                    language=language)
+            if isinstance(output, dict):
+                columns = {task: output.get(task, [[] for _ in missing]) for task in tasks}
+            else:
+                columns = {'tok': output}
+            for j, i in enumerate(missing):
+                result = {}
+                for task, column in columns.items():
+                    value = column[j]
+                    result[task] = tuple(value) if isinstance(value, list) else value
+                results[i] = result
+                if len(texts[i]) <= self.max_cached_text_length:
+                    self.result_cache.put((texts[i], options), result)
+        return results
+
+    @staticmethod
+    def _batch_key(name, *params):
+        """Build a hashable key under which requests can share a batched model call.
+
+        Args:
+            name (str): Name of the batch function
+            *params: Request parameters that must be equal within a batch
 
-        self._send_response({
-            'stats': formatted_stats
-        })
+        Returns:
+            tuple: The batch key
+        """
+        # Parameters that differ only in dict key order merely end up in separate batches
+        return name, json_dumps(params)
 
     def _process_text(self, text, can_duplicate = True, tasks=None, skip_tasks=None, language=None, stopword=None):
         """Process text with HanLP model.
@@ -547,77 +1071,59 @@ class HanLPHandler(BaseHTTPRequestHandler):
         Raises:
             Exception: If processing fails
         """
-        try:
-            # Apply stopword filtering if provided
-            stopword_list = self._process_stopwords(stopword)
+        result = self._process_text_batch([dict(text=text, can_duplicate=can_duplicate, tasks=tasks,
+                                                skip_tasks=skip_tasks, language=language, stopword=stopword)])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
 
-            # Get tokens
-            tokens = self.model(text, tasks=["tok"], skip_tasks=skip_tasks, language=language)
-            if isinstance(tokens, dict):
-                tok_tokens = tokens.get("tok", [])
-            else:
-                tok_tokens = tokens
-
-            # Filter out stopwords
-            filtered_tokens = [token for token in tok_tokens if token not in stopword_list]
-
-            # Create result with filtered tokens
-            result = {}
-            if tasks and "tok" in tasks:
-                result["tok"] = filtered_tokens if can_duplicate else list(dict.fromkeys(filtered_tokens))
-            elif not tasks:  # If no tasks specified, return default tokenization
-                result["tok"] = filtered_tokens if can_duplicate else list(dict.fromkeys(filtered_tokens))
-
-            # Process other tasks if specified
-            if tasks and "pos" in tasks:
-                pos_result = self.model(text, tasks=["pos"], skip_tasks=None, language=language)
-                if isinstance(pos_result, dict):
-                    result["pos"] = pos_result.get("pos", [])
-            if tasks and "ner" in tasks:
-                ner_result = self.model(text, tasks=["ner"], skip_tasks=None, language=language)
-                if isinstance(ner_result, dict):
-                    result["ner"] = ner_result.get("ner", [])
-
-            # Convert Document to dict for JSON serialization
-            if isinstance(result, Document):
-                return result.to_dict()
-            return result
-        except Exception as e:
-            raise Exception(f"Processing failed: {str(e)}")
-
-    def _process_text_with_stats(self, text, can_duplicate = True, tasks=None, skip_tasks=None, language=None, token=None, stopword=None):
-        """Process text with HanLP model and update usage statistics.
+    def _process_text_batch(self, items):
+        """Process a batch of texts with HanLP model.
 
-        This is a wrapper around _process_text that also updates usage statistics
-        if a valid token is provided.
+        All items must share tasks, skip_tasks and language, so that all tasks run
+        as a single model call over all texts.
 
         Args:
-            text (str): Input text to process
-            tasks (list): List of tasks to perform
-            skip_tasks (list): List of tasks to skip
-            language (str): Language of the text
-            token (str): Authentication token for usage tracking
-            stopword: Custom stopwords (string, list, or None)
+            items (list): Keyword arguments of _process_text for each text
 
         Returns:
-            dict: Processed results
+            list: Processed results for each item, or the exception raised while processing it
 
         Raises:
-            Exception: If processing fails
+            Exception: If the model fails
         """
+        tasks = items[0]['tasks']
+        skip_tasks = items[0]['skip_tasks']
+        language = items[0]['language']
+        texts = [item['text'] for item in items]
+        # Run all requested tasks jointly, returning default tokenization if no tasks specified
+        wanted_tasks = [task for task in ('tok', 'pos', 'ner') if tasks and task in tasks] or ['tok']
         try:
-            result = self._process_text(text, can_duplicate=can_duplicate, tasks=tasks, skip_tasks=skip_tasks, language=language, stopword=stopword)
-
-            # Update usage statistics if token is provided
-            if token and self.token_db:
-                self.token_db.add_token_usage(token, len(text))
-
-            return result
+            docs = self._run_model(texts, wanted_tasks, skip_tasks=skip_tasks, language=language)
         except Exception as e:
             raise Exception(f"Processing failed: {str(e)}")
 
-    def _process_word_frequency(self, text, max_words=100, token=None, stopword=None):
-        """Process word frequency counting and update usage statistics.
+        results = []
+        for doc, item in zip(docs, items):
+            try:
+                # Apply stopword filtering if provided
+                stopword_list = self._process_stopwords(item['stopword'])
+
+                # Create result with filtered tokens and other task results
+                result = {}
+                if 'tok' in wanted_tasks:
+                    filtered_tokens = (token for token in doc['tok'] if token not in stopword_list)
+                    result["tok"] = list(filtered_tokens) if item['can_duplicate'] else list(dict.fromkeys(filtered_tokens))
+                for task in ('pos', 'ner'):
+                    if task in wanted_tasks and task in doc:
+                        result[task] = doc[task]
+                results.append(result)
+            except Exception as e:
+                results.append(Exception(f"Processing failed: {str(e)}"))
+        return results
+
+    def _process_word_frequency(self, text, max_words=100, stopword=None):
+        """Process word frequency counting.
 
         This method counts word frequencies in the input text and returns
         the most common words.
@@ -625,7 +1131,6 @@ class HanLPHandler(BaseHTTPRequestHandler):
         Args:
             text (str): Input text to analyze
             max_words (int): Maximum number of words to return (default: 100)
-            token (str): Authentication token for usage tracking
             stopword: Custom stopwords (string, list, or None)
 
         Returns:
@@ -634,42 +1139,56 @@ class HanLPHandler(BaseHTTPRequestHandler):
         Raises:
             Exception: If processing fails
         """
-        try:
-            # Apply stopword filtering if provided
-            stopword_list = self._process_stopwords(stopword)
-
-            # Tokenize text
-            # Use HanLP tokenizer to get tokens
-            tokens = self.model(text, tasks=["tok"], skip_tasks=None, language=None)
-            if isinstance(tokens, dict):
-                tok_tokens = tokens.get("tok", [])
-            else:
-                tok_tokens = tokens
+        result = self._process_word_frequency_batch([dict(text=text, max_words=max_words, stopword=stopword)])[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
 
-            # Filter out stopwords
-            filtered_tokens = [token for token in tok_tokens if token not in stopword_list]
+    def _process_word_frequency_batch(self, items):
+        """Process word frequency counting for a batch of texts with a single tokenizer call.
 
-            # Count word frequencies
-            from collections import Counter
-            word_freq = Counter(filtered_tokens)
-
-            # Get top N words
-            top_words = word_freq.most_common(max_words)
-
-            # Format response
-            result = [
-                {"word": word, "count": count}
-                for word, count in top_words
-            ]
+        Args:
+            items (list): Keyword arguments of _process_word_frequency for each text
 
-            # Update usage statistics if token is provided
-            if token and self.token_db:
-                self.token_db.add_token_usage(token, len(text))
+        Returns:
+            list: Word frequency results for each item, or the exception raised while processing it
 
-            return {"word_frequency": result}
+        Raises:
+            Exception: If the model fails
+        """
+        try:
+            # Tokenize texts with HanLP tokenizer
+            docs = self._run_model([item['text'] for item in items], ['tok'])
         except Exception as e:
             raise Exception(f"Word frequency calculation failed: {str(e)}")
 
+        results = []
+        for doc, item in zip(docs, items):
+            try:
+                # Apply stopword filtering if provided
+                stopword_list = self._process_stopwords(item['stopword'])
+
+                # Count word frequencies, skipping stopwords in the same pass
+                word_freq = {}
+                get_count = word_freq.get
+                for token in doc['tok']:
+                    if token not in stopword_list:
+                        word_freq[token] = get_count(token, 0) + 1
+
+                # Get top N words, keeping first occurrence order among ties
+                top_words = heapq.nlargest(item['max_words'], word_freq.items(), key=itemgetter(1))
+
+                # Format response
+                result = [
+                    {"word": word, "count": count}
+                    for word, count in top_words
+                ]
+
+                results.append({"word_frequency": result})
+            except Exception as e:
+                results.append(Exception(f"Word frequency calculation failed: {str(e)}"))
+        return results
+
     def do_GET(self):
         """Handle GET requests.
 
@@ -677,107 +1196,111 @@ class HanLPHandler(BaseHTTPRequestHandler):
         For API requests, it processes text using query parameters.
         For the root path, it returns API documentation.
         """
-        # Parse URL to determine endpoint
-        parsed_url = urlparse(self.path)
-        endpoint = parsed_url.path
-        query_params = parse_qs(parsed_url.query)
+        # Split off the query string to determine endpoint
+        endpoint = self.path.partition('?')[0]
+        self._begin_request()
 
-        # Handle different endpoints
-        if endpoint == '/stats':
-            return self._handle_stats_request_get()
-        else:
-            # Default text processing endpoint
-            # Extract parameters
-            text_param = query_params.get('text')
-            if not text_param or not isinstance(text_param[0], str) or not text_param[0].strip():
-                # Show API documentation
-                self._send_response({
-                    'message': 'HanLP RESTful API Server',
-                    'endpoints': {
-                        'POST /tokenize': 'Tokenize text with HanLP (supports stopword filtering)',
-                        'GET /': 'API documentation',
-                        'POST /token/request': 'Request a new token (admin only)',
-                        'POST /token/delete': 'Delete a token (admin only)',
-                        'POST /stats': 'Get usage statistics (admin only)',
-                        'POST /word-frequency': 'Get word frequency count (supports stopword filtering)'
-                    },
-                    'parameters': {
-                        'text': 'Text to process (required)',
-                        'tasks': 'Tasks to run (optional)',
-                        'skip_tasks': 'Tasks to skip (optional)',
-                        'language': 'Language of text (optional)',
-                        'stopword': 'Custom stopwords to extend default list (optional)'
-                    },
-                    'authentication': 'Bearer token required in Authorization header'
-                })
-                return
+        # Handle different endpoints, defaulting to text processing
+        return self._GET_ROUTES.get(endpoint, HanLPHandler._handle_text_processing_get)(self)
 
-            text = text_param[0].strip()
-            tasks = query_params.get('tasks')
-            skip_tasks = query_params.get('skip_tasks')
-            language = query_params.get('language')
+    def _handle_text_processing_get(self):
+        """Handle text processing requests with query parameters.
 
-            # Check authentication
-            if not self._check_auth():
-                self._send_error('Unauthorized: Invalid or missing Bearer token', 401)
-                return
+        Without a text parameter, this returns the API documentation.
+        """
+        query_params = parse_query(self.path.partition('?')[2], ('text', 'tasks', 'skip_tasks', 'language'))
 
-            # Submit task to queue
-            task_id = self.task_queue.submit(
-                self._process_text,
+        # Extract parameters
+        text = query_params.get('text', '').strip()
+        if not text:
+            # Show API documentation
+            self._send_response({
+                'message': 'HanLP RESTful API Server',
+                'endpoints': {
+                    'POST /tokenize': 'Tokenize text with HanLP (supports stopword filtering)',
+                    'GET /': 'API documentation',
+                    'POST /token/request': 'Request a new token (admin only)',
+                    'POST /token/delete': 'Delete a token (admin only)',
+                    'POST /stats': 'Get usage statistics (admin only)',
+                    'POST /word-frequency': 'Get word frequency count (supports stopword filtering)'
+                },
+                'parameters': {
+                    'text': 'Text to process (required)',
+                    'tasks': 'Tasks to run (optional)',
+                    'skip_tasks': 'Tasks to skip (optional)',
+                    'language': 'Language of text (optional)',
+                    'stopword': 'Custom stopwords to extend default list (optional)'
+                },
+                'authentication': 'Bearer token required in Authorization header'
+            })
+            return
+
+        tasks = query_params.get('tasks')
+        skip_tasks = query_params.get('skip_tasks')
+        language = query_params.get('language')
+
+        # Check authentication
+        if not self._check_auth():
+            self._send_error('Unauthorized: Invalid or missing Bearer token', 401)
+            return
+
+        tasks = tasks.split(',') if tasks else None
+        skip_tasks = skip_tasks.split(',') if skip_tasks else None
+
+        # Run on the task queue, batched with pending texts that share tasks, skip_tasks and language
+        result = self.task_queue.run_batch(
+            self._process_text_batch,
+            self._batch_key('text', tasks, skip_tasks, language),
+            dict(
                 text=text,
-                tasks=tasks[0].split(',') if tasks and isinstance(tasks[0], str) else None,
-                skip_tasks=skip_tasks[0].split(',') if skip_tasks and isinstance(skip_tasks[0], str) else None,
-                language=language[0] if language and isinstance(language[0], str) else None
+                tasks=tasks,
+                can_duplicate=True,
+                skip_tasks=skip_tasks,
+                language=language,
+                stopword=None
             )
+        )
 
-            # Wait for result with timeout
-            result = self.task_queue.wait_for_result(task_id)
-
-            if result['status'] == 'completed':
-                self._send_response(result['result'])
-            elif result['status'] == 'timeout':
-                self._send_error('Request timeout: Processing took too long', 400)
-            else:
-                self._send_error(f'Processing error: {result["error"]}', 500)
+        if result['status'] == 'completed':
+            self._send_response(result['result'])
+        elif result['status'] == 'timeout':
+            self._send_error('Request timeout: Processing took too long', 400)
+        else:
+            self._send_error(f'Processing error: {result["error"]}', 500)
 
     def _handle_stats_request_get(self):
         """Handle statistics request via GET (admin only).
 
         This endpoint returns usage statistics for all tokens.
-        Includes additional validation to handle potential database inconsistencies.
         """
         # Check admin authentication
         if not self._check_admin_auth():
             self._send_error('Unauthorized: Admin privileges required', 401)
             return
 
-        # Get statistics from database
+        # Get statistics from database, reading the first row so that database errors
+        # are reported before the response is started
         try:
             stats = self.token_db.get_all_tokens_stats()
+            first = list(itertools.islice(stats, 1))
         except Exception as e:
             self._send_error(f'Database error: {str(e)}', 500)
             return
 
-        # Format statistics for response
-        formatted_stats = []
-        for stat in stats:
-            # Validate that stat is a tuple with expected length
-            if not isinstance(stat, (tuple, list)) or len(stat) < 7:
-                continue  # Skip invalid records
-            formatted_stats.append({
-                'token': stat[0] if len(stat) > 0 else '',
-                'applicant_id': stat[1] if len(stat) > 1 else None,
-                'created_at': stat[2] if len(stat) > 2 else None,
-                'usage_count': stat[3] if len(stat) > 3 else 0,
-                'char_count': stat[4] if len(stat) > 4 else 0,
-                'is_valid': bool(stat[5]) if len(stat) > 5 else False,
-                'is_admin': bool(stat[6]) if len(stat) > 6 else False
-            })
+        # Format statistics while streaming them to the client
+        self._send_stats(itertools.chain(first, stats))
 
-        self._send_response({
-            'stats': formatted_stats
-        })
+    # Endpoint handlers, looked up by request path
+    _POST_ROUTES = {
+        '/token/request': _handle_token_request,
+        '/token/delete': _handle_token_delete,
+        '/stats': _handle_stats_request,
+        '/tokenize': _handle_text_processing,
+        '/word-frequency': _handle_word_frequency,
+    }
+    _GET_ROUTES = {
+        '/stats': _handle_stats_request_get,
+    }
 
 
 class HanLPServer:
@@ -787,7 +1310,8 @@ class HanLPServer:
     parsing and server startup functionality.
     """
 
-    def __init__(self, host='localhost', port=8000, admin_token=None, db_path="tokens.db"):
+    def __init__(self, host='localhost', port=8000, admin_token=None, db_path="tokens.db", token_secret=None,
+                 usage_flush_interval=0.5, batch_delay=0, mixed_precision=False, workers=1):
         """Initialize the server with configuration parameters.
 
         Args:
@@ -795,22 +1319,117 @@ class HanLPServer:
             port (int): Port number to bind to (default: 8000)
             admin_token (str): Admin token for privileged operations
             db_path (str): Path to SQLite database file (default: 'tokens.db')
+            token_secret (str): Secret for signing issued tokens (optional)
+            usage_flush_interval (float): Seconds between writes of usage statistics, 0 to write
+                them on every request (default: 0.5)
+            batch_delay (float): Seconds to collect requests into a batch before running the model
+                (default: 0, batches only form while the workers are busy)
+            mixed_precision (bool): Run the model in bfloat16 on a CUDA device supporting it,
+                faster but slightly less accurate (default: False)
+            workers (int): Number of server processes sharing the port, each with its own
+                model (default: 1)
         """
         self.host = host
         self.port = port
         self.admin_token = admin_token
         self.db_path = db_path
+        self.token_secret = token_secret
+        self.usage_flush_interval = usage_flush_interval
+        self.batch_delay = batch_delay
+        self.mixed_precision = mixed_precision
+        self.workers = workers
+        # Index of this worker process, None when the server runs in a single process
+        self.worker_index = None
         self.server = None
+        self.serverv6 = None
 
     def run_ipv6_server(self):
         self.serverv6.serve_forever()
 
+    def run_db_maintenance(self, interval=3600):
+        """Periodically refresh query planner statistics and reclaim free database pages.
+
+        Args:
+            interval (int): Seconds between maintenance runs (default: 3600)
+        """
+        while True:
+            time.sleep(interval)
+            try:
+                HanLPHandler.token_db.maintenance()
+            except Exception as e:
+                print(f"Database maintenance failed: {e}")
+
+    def _create_server(self, server_class):
+        """Create and bind an HTTP server, sharing the port with the other workers if there are any.
+
+        Args:
+            server_class: ThreadingHTTPServer or HTTPServerV6
+
+        Returns:
+            ThreadingHTTPServer: The bound server
+        """
+        server = server_class((self.host, self.port), HanLPHandler, bind_and_activate=False)
+        server.reuse_port = self.worker_index is not None
+        try:
+            server.server_bind()
+            server.server_activate()
+        except Exception:
+            server.server_close()
+            raise
+        return server
+
+    def run_worker(self, index):
+        """Run one of several server processes.
+
+        Args:
+            index (int): Index of the worker process
+        """
+        self.worker_index = index
+        # Worker threads don't survive a fork, so the inherited task queue has none
+        HanLPHandler.task_queue = TaskQueue(max_workers=5, timeout=180)
+        self.start()
+
+    def start_workers(self):
+        """Start the server in several processes listening on the same port.
+
+        The database and admin token are set up once before the processes start.
+        """
+        if self.db_path == ':memory:':
+            raise ValueError('Workers cannot share an in-memory database')
+        from hanlp.server.db import TokenDB
+        token_db = TokenDB(self.db_path, secret=self.token_secret)
+        if self.admin_token:
+            token_db.add_token(self.admin_token, 0, is_admin=True)
+        token_db.close()
+
+        processes = [multiprocessing.Process(target=self.run_worker, args=(i,)) for i in range(self.workers)]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            # Ctrl+C reaches the whole process group, so the workers shut down by themselves
+            for process in processes:
+                process.join()
+
     def start(self):
         """Start the server.
 
         This method initializes the HanLP model and token database,
-        then starts the HTTP server.
+        then starts the HTTP server. With several workers, each of them
+        does so in its own process.
         """
+        if self.workers > 1 and self.worker_index is None:
+            self.start_workers()
+            return
+
+        # Checked in the process that runs the model, since querying the device initializes CUDA,
+        # which a forked worker couldn't use anymore
+        if self.mixed_precision and not (torch is not None and hasattr(torch, 'autocast')
+                                         and torch.cuda.is_available() and torch.cuda.is_bf16_supported()):
+            raise ValueError('Mixed precision requires PyTorch 1.10 or later and a CUDA device supporting bfloat16')
+
         # Initialize model before starting server
         print("Initializing HanLP model...")
         HanLPHandler.initialize_model()
@@ -818,7 +1437,11 @@ class HanLPServer:
 
         # Initialize token database
         from hanlp.server.db import TokenDB
-        HanLPHandler.token_db = TokenDB(self.db_path)
+        HanLPHandler.token_db = TokenDB(self.db_path, secret=self.token_secret,
+                                        usage_flush_interval=self.usage_flush_interval)
+
+        HanLPHandler.task_queue.batch_delay = self.batch_delay
+        HanLPHandler.mixed_precision = self.mixed_precision
 
         # Set admin token if provided
         HanLPHandler.admin_token = self.admin_token
@@ -827,11 +1450,13 @@ class HanLPServer:
             HanLPHandler.token_db.add_token(self.admin_token, 0, is_admin=True)
 
         if ':' in self.host:
-            self.serverv6 = HTTPServerV6((self.host, self.port), HanLPHandler)
+            self.serverv6 = self._create_server(HTTPServerV6)
             print(f"Starting HanLP RESTful API IPV6 server on [{self.host}]:{self.port}")
             self.host = '0.0.0.0'
-        self.server = HTTPServer((self.host, self.port), HanLPHandler) 
+        self.server = self._create_server(ThreadingHTTPServer)
         print(f"Starting HanLP RESTful API server on {self.host}:{self.port}")
+        if self.worker_index is not None:
+            print(f"Worker {self.worker_index + 1} of {self.workers}")
         print(f"Database: {self.db_path}")
         if self.admin_token:
             print(f"Admin token configured")
@@ -840,14 +1465,20 @@ class HanLPServer:
         try:
             if self.serverv6 is not None:
                threading.Thread(target=self.run_ipv6_server, daemon=True).start()
+            if not self.worker_index:
+                # One process is enough to maintain the shared database
+                threading.Thread(target=self.run_db_maintenance, daemon=True).start()
 
             self.server.serve_forever()
 
         except KeyboardInterrupt:
             print("\nShutting down server...")
             self.server.shutdown()
-            # if self.serverv6 is not None:
-            #     self.serverv6.shutdown()
+            if self.serverv6 is not None:
+                self.serverv6.shutdown()
+            HanLPHandler.task_queue.shutdown()
+            # Write buffered usage statistics before exiting
+            HanLPHandler.token_db.close()
 
     @classmethod
     def from_args(cls):
@@ -868,10 +1499,30 @@ class HanLPServer:
                           help='Administrator token for privileged operations')
         parser.add_argument('--db-path', type=str, default='tokens.db',
                           help='Path to SQLite database file (default: tokens.db)')
+        parser.add_argument('--token-secret', type=str,
+                          help='Secret for signing issued tokens, lets the server reject forged tokens '
+                               'without a database lookup')
+        parser.add_argument('--usage-flush-interval', type=float, default=0.5,
+                          help='Seconds between writes of buffered usage statistics, 0 to write them '
+                               'on every request (default: 0.5)')
+        parser.add_argument('--batch-delay', type=float, default=0,
+                          help='Seconds to collect concurrent requests into one model call before running it '
+                               '(default: 0)')
+        parser.add_argument('--mixed-precision', action='store_true',
+                          help='Run the model in bfloat16 on CUDA devices, faster but slightly less accurate')
+        parser.add_argument('--workers', type=int, default=1,
+                          help='Number of server processes sharing the port, each loads its own model '
+                               '(default: 1)')
 
         args = parser.parse_args()
-
-        return cls(host=args.host, port=args.port, admin_token=args.admin_token, db_path=args.db_path)
+        if args.workers > 1 and not hasattr(socket, 'SO_REUSEPORT'):
+            parser.error('--workers requires SO_REUSEPORT, which this platform does not support')
+        if args.workers > 1 and args.db_path == ':memory:':
+            parser.error('--workers requires a database file shared by the workers')
+
+        return cls(host=args.host, port=args.port, admin_token=args.admin_token, db_path=args.db_path,
+                   token_secret=args.token_secret, usage_flush_interval=args.usage_flush_interval,
+                   batch_delay=args.batch_delay, mixed_precision=args.mixed_precision, workers=args.workers)
 
 # import debugpy
 
@@ -6,16 +6,22 @@ Test script for HanLP RESTful API Server
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import threading
 import time
 
+# Reuse connections across requests, the server keeps them alive
+session = requests.Session()
+session.mount('http://', HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=0))
+
 def test_server():
     """Test the HanLP RESTful API server"""
 
     # Server configuration
     server_url = "http://localhost:8000"
     auth_token = "test-token"
+    session.headers.update({"Authorization": f"Bearer {auth_token}"})
 
     # Test text
     test_text = "HanLP是一个强大的自然语言处理工具包，支持多种语言和任务。"
@@ -23,7 +29,6 @@ def test_server():
     # Test POST request
     print("Testing POST request...")
     headers = {
-        "Authorization": f"Bearer {auth_token}",
         "Content-Type": "application/json"
     }
 
@@ -33,7 +38,7 @@ def test_server():
     }
 
     try:
-        response = requests.post(server_url, headers=headers, json=data)
+        response = session.post(server_url, headers=headers, json=data)
         print(f"Status Code: {response.status_code}")
         if response.status_code == 200:
             result = response.json()
@@ -51,12 +56,8 @@ def test_server():
         "tasks": "tok,pos"
     }
 
-    headers = {
-        "Authorization": f"Bearer {auth_token}"
-    }
-
     try:
-        response = requests.get(server_url, headers=headers, params=params)
+        response = session.get(server_url, params=params)
         print(f"Status Code: {response.status_code}")
         if response.status_code == 200:
             result = response.json()
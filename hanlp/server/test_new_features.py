@@ -6,9 +6,14 @@ Test script for HanLP RESTful API Server with new features
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
 
+# Reuse connections across requests, the server keeps them alive
+session = requests.Session()
+session.mount('http://', HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=0))
+
 def test_server():
     """Test the HanLP RESTful API server with new features"""
 
@@ -24,7 +29,7 @@ def test_server():
         "user_id": 12345
     }
 
-    response = requests.post(f"{server_url}/token/request", json=request_data)
+    response = session.post(f"{server_url}/token/request", json=request_data)
     print(f"Status Code: {response.status_code}")
     if response.status_code == 200:
         token_response = response.json()
@@ -48,7 +53,7 @@ def test_server():
         "tasks": ["tok", "pos"]
     }
 
-    response = requests.post(server_url, headers=headers, json=process_data)
+    response = session.post(server_url, headers=headers, json=process_data)
     print(f"Status Code: {response.status_code}")
     if response.status_code == 200:
         result = response.json()
@@ -70,7 +75,7 @@ def test_server():
         "is_admin": False
     }
 
-    response = requests.post(f"{server_url}/token/add", headers=admin_headers, json=add_token_data)
+    response = session.post(f"{server_url}/token/add", headers=admin_headers, json=add_token_data)
     print(f"Status Code: {response.status_code}")
     if response.status_code == 200:
         result = response.json()
@@ -86,7 +91,7 @@ def test_server():
         "Content-Type": "application/json"
     }
 
-    response = requests.post(server_url, headers=new_token_headers, json=process_data)
+    response = session.post(server_url, headers=new_token_headers, json=process_data)
     print(f"Status Code: {response.status_code}")
     if response.status_code == 200:
         result = response.json()
@@ -101,7 +106,7 @@ def test_server():
         "token": "new-test-token"
     }
 
-    response = requests.post(f"{server_url}/token/delete", headers=admin_headers, json=delete_token_data)
+    response = session.post(f"{server_url}/token/delete", headers=admin_headers, json=delete_token_data)
     print(f"Status Code: {response.status_code}")
     if response.status_code == 200:
         result = response.json()
@@ -112,7 +117,7 @@ def test_server():
 
     # 6. Test statistics endpoint
     print("\n6. Testing statistics endpoint...")
-    response = requests.post(f"{server_url}/stats", headers=admin_headers)
+    response = session.post(f"{server_url}/stats", headers=admin_headers)
     print(f"Status Code: {response.status_code}")
     if response.status_code == 200:
         result = response.json()
@@ -123,7 +128,7 @@ def test_server():
 
     # 7. Test that deleted token no longer works
     print("\n7. Testing that deleted token no longer works...")
-    response = requests.post(server_url, headers=new_token_headers, json=process_data)
+    response = session.post(server_url, headers=new_token_headers, json=process_data)
     print(f"Status Code: {response.status_code}")
     if response.status_code == 401:
         print("Correctly rejected deleted token")
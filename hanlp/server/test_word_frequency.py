@@ -4,9 +4,14 @@ Test script for word-frequency endpoint with async queue processing
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
 
+# Reuse connections across requests, the server keeps them alive
+session = requests.Session()
+session.mount('http://', HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=0))
+
 def test_word_frequency():
     """Test the word-frequency endpoint"""
 
@@ -27,7 +32,7 @@ def test_word_frequency():
         "user_id": 12345
     }
 
-    response = requests.post(f"{server_url}/token/request", headers=admin_headers, json=token_request_data)
+    response = session.post(f"{server_url}/token/request", headers=admin_headers, json=token_request_data)
     if response.status_code == 200:
         token_response = response.json()
         test_token = token_response["token"]
@@ -49,7 +54,7 @@ def test_word_frequency():
         "max_words": 10
     }
 
-    response = requests.post(f"{server_url}/word-frequency", headers=headers, json=word_freq_data)
+    response = session.post(f"{server_url}/word-frequency", headers=headers, json=word_freq_data)
     print(f"Status Code: {response.status_code}")
     if response.status_code == 200:
         result = response.json()
@@ -0,0 +1,91 @@
+# -*- coding:utf-8 -*-
+# Date: 2026-10-15
+import threading
+import time
+import unittest
+from urllib.parse import parse_qs
+
+from hanlp.server.server import TaskQueue, parse_query
+
+
+def double_all(items):
+    return [item * 2 for item in items]
+
+
+class TestParseQuery(unittest.TestCase):
+    def test_parity_with_parse_qs(self):
+        keys = ('text', 'tasks', 'language')
+        for query in ['text=hello+world&tasks=tok,pos',
+                      'text=&text=a%20b',
+                      'text=%E4%BD%A0%E5%A5%BD&language=zh&other=1',
+                      'tex%74=encoded+name',
+                      '',
+                      'flag&tasks=&text=1&text=2']:
+            expected = {key: values[0] for key, values in parse_qs(query).items() if key in keys}
+            self.assertEqual(parse_query(query, keys), expected, query)
+
+
+class TestTaskQueue(unittest.TestCase):
+    def setUp(self):
+        self.task_queue = TaskQueue(max_workers=2, timeout=5)
+
+    def tearDown(self):
+        self.task_queue.shutdown()
+
+    def test_submit(self):
+        task_id = self.task_queue.submit(sum, [1, 2, 3])
+        self.assertEqual(self.task_queue.wait_for_result(task_id)['result'], 6)
+        # Results can be waited for only once
+        self.assertEqual(self.task_queue.wait_for_result(task_id)['status'], 'timeout')
+
+    def test_pending_items_share_a_batch(self):
+        task_queue = TaskQueue(max_workers=1, timeout=5)
+        release = threading.Event()
+        calls = []
+
+        def record(items):
+            calls.append(len(items))
+            return double_all(items)
+
+        blocker = task_queue.submit(release.wait)
+        task_ids = [task_queue.submit_batch(record, 'key', i) for i in range(10)]
+        release.set()
+        self.assertEqual([task_queue.wait_for_result(task_id)['result'] for task_id in task_ids],
+                         [i * 2 for i in range(10)])
+        self.assertEqual(calls, [10])
+        task_queue.wait_for_result(blocker)
+        task_queue.shutdown()
+
+    def test_failed_items(self):
+        def fail_odd(items):
+            return [ValueError('odd') if item % 2 else item for item in items]
+
+        self.assertEqual(self.task_queue.run_batch(fail_odd, 'key', 2)['result'], 2)
+        self.assertEqual(self.task_queue.run_batch(fail_odd, 'key', 1)['status'], 'error')
+
+    def test_run_batch_under_concurrency(self):
+        failures = []
+
+        def run(offset):
+            for i in range(offset, offset + 200):
+                result = self.task_queue.run_batch(double_all, 'key', i)
+                if result.get('result') != i * 2:
+                    failures.append((i, result))
+
+        threads = [threading.Thread(target=run, args=(n * 1000,)) for n in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(failures, [])
+        self.assertEqual(self.task_queue.batches, {})
+
+    def test_timeout(self):
+        task_queue = TaskQueue(max_workers=1, timeout=0.05)
+        result = task_queue.run_batch(lambda items: time.sleep(0.2) or items, 'key', 1)
+        self.assertEqual(result['status'], 'timeout')
+        task_queue.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
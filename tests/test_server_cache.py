@@ -0,0 +1,56 @@
+# -*- coding:utf-8 -*-
+# Date: 2026-10-15
+import time
+import unittest
+
+from hanlp.server.cache import BloomFilter, LRUCache
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        items = [f'token-{i}' for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertEqual(len(bloom), 1000)
+        for item in items:
+            self.assertIn(item, bloom)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f'token-{i}')
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        # Filled to capacity, the rate should stay close to error_rate
+        self.assertLess(false_positives / 10000, 0.03)
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_ttl_expiry(self):
+        cache = LRUCache(maxsize=10, ttl=0.05)
+        cache.put('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        time.sleep(0.1)
+        self.assertEqual(cache.get('a', 'expired'), 'expired')
+        self.assertEqual(len(cache), 0)
+
+    def test_pop(self):
+        cache = LRUCache()
+        cache.put('a', 1)
+        self.assertEqual(cache.pop('a'), 1)
+        self.assertIsNone(cache.pop('a'))
+
+
+if __name__ == '__main__':
+    unittest.main()
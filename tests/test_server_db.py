@@ -0,0 +1,173 @@
+# -*- coding:utf-8 -*-
+# Date: 2026-10-15
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from hanlp.server import db
+from hanlp.server.db import TokenDB
+
+
+class TestTokenDB(unittest.TestCase):
+    def test_authorize_and_charge_unbuffered(self):
+        token_db = TokenDB(':memory:', usage_flush_interval=0)
+        token_db.add_token('user', 1)
+        token_db.add_token('admin', 0, is_admin=True)
+        self.assertIs(token_db.authorize_and_charge('user', 5), False)
+        self.assertIs(token_db.authorize_and_charge('admin', 1), True)
+        self.assertIsNone(token_db.authorize_and_charge('unknown', 1))
+        # usage_count and char_count
+        self.assertEqual(token_db.get_token_info('user')[4:6], (1, 5))
+        token_db.invalidate_token('user')
+        self.assertIsNone(token_db.authorize_and_charge('user', 5))
+        self.assertEqual(token_db.get_token_info('user')[4:6], (1, 5))
+        token_db.close()
+
+    def test_authorize_and_charge_buffered(self):
+        token_db = TokenDB(':memory:', usage_flush_interval=60)
+        token_db.add_token('user', 1)
+        self.assertIs(token_db.authorize_and_charge('user', 5), False)
+        self.assertIs(token_db.authorize_and_charge('user', 3), False)
+        self.assertIsNone(token_db.authorize_and_charge('unknown', 1))
+        # Reading statistics writes the buffered usage first
+        self.assertEqual(token_db.get_token_info('user')[4:6], (2, 8))
+        token_db.invalidate_token('user')
+        self.assertIsNone(token_db.authorize_and_charge('user', 5))
+        token_db.close()
+
+    def test_invalidated_during_status_query(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            token_db = TokenDB(os.path.join(tmp, 'tokens.db'), usage_flush_interval=0)
+            token_db.add_token('user', 1)
+            conn = token_db._conn
+
+            @contextlib.contextmanager
+            def conn_then_invalidate():
+                with conn() as c:
+                    yield c
+                # The status has been read, but not cached yet
+                token_db._conn = conn
+                token_db.invalidate_token('user')
+
+            token_db._conn = conn_then_invalidate
+            self.assertTrue(token_db.is_valid_token('user'))
+            self.assertFalse(token_db.is_valid_token('user'))
+            token_db.close()
+
+    def test_signed_tokens(self):
+        token_db = TokenDB(':memory:', secret='secret', usage_flush_interval=0)
+        token = token_db.generate_token(1)
+        token_db.add_token(token, 1)
+        self.assertTrue(token_db.is_valid_token(token))
+        forged = token[:-1] + ('A' if token[-1] != 'A' else 'B')
+        self.assertFalse(token_db.is_valid_token(forged))
+        self.assertFalse(token_db.is_valid_token('hlp_1.nonce.\xe9'))
+        self.assertIsNone(token_db.authorize_and_charge(token[:-1] + '\xe9', 1))
+        token_db.close()
+
+    def test_tokens_added_by_another_process(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'tokens.db')
+            token_db = TokenDB(db_path, usage_flush_interval=0)
+            other = TokenDB(db_path, usage_flush_interval=0)
+            self.assertFalse(token_db.is_valid_token('user'))
+            other.add_token('user', 1)
+            # Found right away, not only after the next refresh of the Bloom filter
+            self.assertTrue(token_db.is_valid_token('user'))
+            other.close()
+            token_db.close()
+
+    def test_local_tokens_counted_once(self):
+        token_db = TokenDB(':memory:', usage_flush_interval=0)
+        for i in range(100):
+            token_db.add_token(f'user-{i}', i)
+        token_db.add_tokens_bulk([(f'bulk-{i}', i, False) for i in range(100)])
+        token_db._refresh_known_tokens()
+        self.assertEqual(len(token_db._known_tokens), 200)
+        token_db.close()
+
+    def test_unsigned_tokens_with_secret(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'tokens.db')
+            TokenDB(db_path, usage_flush_interval=0).add_token('legacy', 1)
+            token_db = TokenDB(db_path, secret='secret', usage_flush_interval=0)
+            self.assertTrue(token_db.is_valid_token('legacy'))
+            # Unsigned tokens not in the database are rejected without a query
+            self.assertFalse(token_db._may_exist('forged'))
+            other = TokenDB(db_path, usage_flush_interval=0)
+            other.add_token('admin', 0, is_admin=True)
+            self.assertTrue(token_db.is_valid_token('admin'))
+            other.close()
+            token_db.close()
+
+    @mock.patch.object(db, 'LISTING_PAGE_SIZE', 2)
+    def test_listings_across_pages(self):
+        token_db = TokenDB(':memory:', usage_flush_interval=0)
+        for i, usage in enumerate([3, 1, 3, 0, 1]):
+            token_db.add_token(f'user-{i}', i)
+            for _ in range(usage):
+                token_db.authorize_and_charge(f'user-{i}', 1)
+        token_db.invalidate_token('user-1')
+        stats = []
+        for row in token_db.get_all_tokens_stats():
+            # The single in-memory connection is free between pages
+            self.assertEqual(token_db.is_valid_token(row[0]), row[5] == 1)
+            stats.append((row[0], row[3]))
+        self.assertEqual(stats, [('user-0', 3), ('user-2', 3), ('user-1', 1), ('user-4', 1), ('user-3', 0)])
+        self.assertEqual(list(token_db.get_valid_tokens()), ['user-0', 'user-2', 'user-3', 'user-4'])
+        token_db.close()
+
+    def test_failed_flush_keeps_usage(self):
+        token_db = TokenDB(':memory:', usage_flush_interval=60)
+        token_db.add_token('user', 1)
+        token_db.authorize_and_charge('user', 5)
+        write_tx = token_db._write_tx
+
+        def locked():
+            raise sqlite3.OperationalError('database is locked')
+
+        token_db._write_tx = locked
+        with self.assertRaises(sqlite3.OperationalError):
+            token_db.flush()
+        token_db.authorize_and_charge('user', 3)
+        token_db._write_tx = write_tx
+        self.assertEqual(token_db.get_token_info('user')[4:6], (2, 8))
+        token_db.close()
+
+    def test_flush_thread_survives_lock_error(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'tokens.db')
+            token_db = TokenDB(db_path, usage_flush_interval=0.01)
+            token_db.add_token('user', 1)
+            write_tx = token_db._write_tx
+            failures = [sqlite3.OperationalError('database is locked')]
+
+            def fail_once():
+                if failures:
+                    raise failures.pop()
+                return write_tx()
+
+            token_db._write_tx = fail_once
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                token_db.authorize_and_charge('user', 5)
+                # Read through a separate connection, so only the flush thread can have written it
+                conn = sqlite3.connect(db_path)
+                for _ in range(200):
+                    usage = conn.execute('SELECT usage_count, char_count FROM tokens WHERE token = ?',
+                                         ('user',)).fetchone()
+                    if usage == (1, 5):
+                        break
+                    time.sleep(0.01)
+                conn.close()
+            self.assertEqual(usage, (1, 5))
+            self.assertIn('database is locked', output.getvalue())
+            token_db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()